@@ -0,0 +1,101 @@
+"""Cold-start benchmark for the Flask backend.
+
+Run from the project root:
+
+    python benchmarks/startup.py [--runs 5] [--target-ms 1000]
+
+Reports
+  * `import app` cost, taken from `python -X importtime` with the
+    interpreter's own startup imports left out
+  * the heaviest modules pulled in by create_app()
+  * time to first request: a fresh interpreter that builds the app and
+    serves GET /api/ping, measured end to end
+
+Exits with status 1 when the median time to first request is above the
+target, so it can be used as a CI gate.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUEST_SNIPPET = """
+from app import create_app
+app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+resp = app.test_client().get('/api/ping')
+assert resp.status_code == 200, resp.status_code
+"""
+
+
+def import_times(code):
+    """Return [(cumulative_us, module, depth)] from `python -X importtime -c code`."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        # one separator space, then two spaces per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative_us), name.strip(), depth))
+    return rows
+
+
+def snippet_rows(code):
+    """import_times(code) minus the modules the interpreter loads on its
+    own (site, encodings, ...), which `-c pass` also reports."""
+    startup = {name for _, name, _ in import_times('pass')}
+    return [r for r in import_times(code) if r[1] not in startup]
+
+
+def top_level_total(rows):
+    # depth 0 is a direct import from the -c snippet; its cumulative time
+    # already includes everything imported below it
+    return sum(us for us, _, depth in rows if depth == 0)
+
+
+def first_request_ms():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', FIRST_REQUEST_SNIPPET], cwd=ROOT, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--target-ms', type=float, default=1000.0,
+                        help='max median time to first request (default: 1000)')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    module_import = top_level_total(snippet_rows('import app'))
+    print(f"import app:               {module_import / 1000:8.1f} ms")
+
+    full = snippet_rows(FIRST_REQUEST_SNIPPET)
+    print(f"create_app() imports:     {top_level_total(full) / 1000:8.1f} ms")
+    print("heaviest modules:")
+    for us, name, depth in sorted((r for r in full if r[2] <= 1), reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    samples = [first_request_ms() for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"time to first request:    {median:8.1f} ms "
+          f"(median of {args.runs}, min {min(samples):.1f}, max {max(samples):.1f})")
+    print(f"target:                   {args.target_ms:8.1f} ms")
+
+    if median > args.target_ms:
+        print("❌ Over target")
+        return 1
+    print("✅ Within target")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+from flask import jsonify
+from flask_bcrypt import Bcrypt
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+from models import User
+from ratelimit import RateLimiter
+
+# ----------------------------
+# EXTENSIONS
+# - created unbound here and attached to an app in init_extensions()
+# ----------------------------
+bcrypt = Bcrypt()
+jwt = JWTManager()
+cors = CORS()
+limiter = RateLimiter()
+
+
+def init_extensions(app):
+    cors.init_app(app)
+    bcrypt.init_app(app)
+    jwt.init_app(app)
+    limiter.init_app(app)
+
+# ----------------------------
+# JWT CONFIGURATION
+# ----------------------------
+@jwt.user_lookup_loader
+def user_lookup_callback(_jwt_header, jwt_data):
+    # jwt_data['sub'] comes as a string from the JWT token
+    identity = jwt_data.get("sub")
+    try:
+        # Convert to integer for database lookup
+        user_id = int(identity) if isinstance(identity, str) else identity
+        return User.query.get(user_id)
+    except Exception as e:
+        print("❌ JWT identity parsing error:", repr(e), "jwt_data:", jwt_data)
+        return None
+
+# JWT error handler
+@jwt.invalid_token_loader
+def invalid_token_callback(error):
+    print(f"❌ Invalid token error: {error}")
+    return jsonify({'msg': 'Invalid token. Please log in again.'}), 401
+
+@jwt.expired_token_loader
+def expired_token_callback(jwt_header, jwt_data):
+    print(f"❌ Token expired: {jwt_data}")
+    return jsonify({'msg': 'Token has expired. Please log in again.'}), 401
+
+@jwt.unauthorized_loader
+def missing_token_callback(error):
+    print(f"❌ Missing token error: {error}")
+    return jsonify({'msg': 'Missing authorization token.'}), 401
@@ -0,0 +1,150 @@
+import click
+from collections import Counter
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, inspect, insert, update
+from db import db
+from models import Product, ProductFacet
+
+# ----------------------------
+# CATALOG FACETS
+# - product_facets holds one count per (category, facet, value); category
+#   '' is the whole catalog, so every product counts once globally and once
+#   within its own category
+# - Product insert/update/delete events adjust the counts in the same
+#   transaction, so reading facets never touches the products table
+# ----------------------------
+FACET_FIELDS = ('category', 'featured', 'is_new', 'stock', 'price')
+
+# (lower bound inclusive, upper bound exclusive); None = open ended
+PRICE_BUCKETS = [(0, 1000), (1000, 5000), (5000, 10000), (10000, 20000), (20000, None)]
+
+
+def price_bucket(price):
+    price = float(price or 0)
+    for low, high in PRICE_BUCKETS:
+        if high is None or price < high:
+            return f'{low}+' if high is None else f'{low}-{high}'
+
+
+def facet_values(row):
+    """(category scope, facet, value) keys for a product given as a dict of
+    FACET_FIELDS."""
+    category = row['category'] or 'Uncategorized'
+    values = [
+        ('category', category),
+        ('featured', 'true' if row['featured'] else 'false'),
+        ('is_new', 'true' if row['is_new'] else 'false'),
+        ('in_stock', 'true' if (row['stock'] or 0) > 0 else 'false'),
+        ('price', price_bucket(row['price'])),
+    ]
+    return [(scope, f, v) for scope in ('', category) for f, v in values]
+
+
+def apply_changes(connection, old_rows=(), new_rows=()):
+    """Adjust counts for products going from `old_rows` to `new_rows`.
+
+    Either side may be empty (insert/delete). Rows are dicts with the
+    FACET_FIELDS keys. Only counts that actually change are written.
+    """
+    deltas = Counter()
+    for row in old_rows:
+        deltas.subtract(facet_values(row))
+    for row in new_rows:
+        deltas.update(facet_values(row))
+    changed = [{'category': c, 'facet': f, 'value': v, 'count': d}
+               for (c, f, v), d in deltas.items() if d]
+    if changed:
+        _add_counts(connection, changed)
+
+
+def _add_counts(connection, rows):
+    table = ProductFacet.__table__
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted['count'])
+        connection.execute(stmt, rows)
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['category', 'facet', 'value'],
+            set_={'count': table.c.count + stmt.excluded['count']},
+        )
+        connection.execute(stmt, rows)
+    else:
+        for row in rows:
+            res = connection.execute(
+                update(table)
+                .where(table.c.category == row['category'], table.c.facet == row['facet'],
+                       table.c.value == row['value'])
+                .values(count=table.c.count + row['count'])
+            )
+            if not res.rowcount:
+                connection.execute(insert(table), row)
+
+
+def _current(target):
+    return {f: getattr(target, f) for f in FACET_FIELDS}
+
+
+# load the old value when a facet column is assigned, so its history
+# has it even if the attribute was expired (e.g. by a commit) and not read
+for _field in FACET_FIELDS:
+    event.listen(getattr(Product, _field), 'set', lambda *args: None, active_history=True)
+
+
+def _previous(target):
+    state = inspect(target)
+    row = {}
+    for f in FACET_FIELDS:
+        history = state.attrs[f].history
+        row[f] = history.deleted[0] if history.deleted else getattr(target, f)
+    return row
+
+
+@event.listens_for(Product, 'after_insert')
+def _product_inserted(_mapper, connection, target):
+    apply_changes(connection, new_rows=[_current(target)])
+
+
+@event.listens_for(Product, 'after_update')
+def _product_updated(_mapper, connection, target):
+    apply_changes(connection, [_previous(target)], [_current(target)])
+
+
+@event.listens_for(Product, 'after_delete')
+def _product_deleted(_mapper, connection, target):
+    apply_changes(connection, old_rows=[_previous(target)])
+
+
+def get_facets(category=None):
+    """{facet: {value: count}} read from product_facets only, for the whole
+    catalog or for one category."""
+    result = {'category': {}, 'featured': {}, 'is_new': {}, 'in_stock': {}, 'price': {}}
+    for f in ProductFacet.query.filter(ProductFacet.category == (category or ''),
+                                       ProductFacet.count > 0):
+        result.setdefault(f.facet, {})[f.value] = f.count
+    return result
+
+
+def rebuild():
+    """Recompute product_facets from the products table (one full scan).
+
+    Only needed once for rows written outside the ORM, e.g. by schema.sql.
+    """
+    db.session.query(ProductFacet).delete()
+    rows = db.session.query(
+        Product.category, Product.featured, Product.is_new, Product.stock, Product.price
+    )
+    apply_changes(db.session.connection(), new_rows=[r._asdict() for r in rows])
+    db.session.commit()
+    return db.session.query(func.count(ProductFacet.facet)).scalar()
+
+
+@click.command('rebuild-facets')
+@with_appcontext
+def rebuild_facets_command():
+    """Recompute catalog facet counts from the products table."""
+    print(f"✅ Rebuilt {rebuild()} facet counts")
@@ -0,0 +1,242 @@
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+from sqlalchemy import and_, func, insert, text
+from db import db
+from models import Product, InventoryMovement, StockSnapshot, LatestSnapshot
+
+# ----------------------------
+# INVENTORY LEDGER
+# - every stock change is appended to inventory_movements
+# - `flask reconcile-inventory` (run periodically, e.g. from cron) writes a
+#   stock_snapshots row for every product with new movements, so the stock
+#   at any time is "snapshot + movements since the last reconcile"
+# - writers and reconcile both lock the products rows they touch, so a
+#   snapshot never sits above a movement that is still uncommitted
+# ----------------------------
+PURCHASE = 'purchase'
+REFUND = 'refund'
+RESTOCK = 'restock'
+ADJUSTMENT = 'adjustment'
+MOVEMENT_KINDS = (PURCHASE, REFUND, RESTOCK, ADJUSTMENT)
+
+# products handled per query/transaction; also bounds IN (...) bind counts
+CHUNK_SIZE = 500
+
+
+def movement(product_id, kind, delta, reference=None):
+    """Build a ledger row for record_movements()."""
+    if kind not in MOVEMENT_KINDS:
+        raise ValueError(f'Unknown movement kind: {kind}')
+    return {'product_id': product_id, 'kind': kind, 'delta': int(delta), 'reference': reference}
+
+
+def record_movements(rows):
+    """Append a batch of movements in one multi-row INSERT.
+
+    Runs inside the caller's transaction, so the ledger commits or rolls
+    back together with the Product.stock change it describes. The products
+    rows are locked here too, which makes reconcile wait for this
+    transaction; callers that read stock before changing it must take the
+    locks earlier, with lock_products().
+    """
+    rows = [r for r in rows if r['delta']]
+    if not rows:
+        return
+    _lock_products(sorted({r['product_id'] for r in rows}))
+    now = datetime.utcnow()
+    db.session.execute(insert(InventoryMovement), [dict(r, created_at=now) for r in rows])
+
+
+def _sqlite_write_lock():
+    """SQLite has no row locks: take the database write lock instead, before
+    anything is read, so later reads see committed data. Returns False on
+    other databases."""
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return False
+    db.session.execute(text('UPDATE products SET id = id WHERE 0'))
+    return True
+
+
+def _lock_products(product_ids):
+    if not _sqlite_write_lock():
+        db.session.query(Product.id).filter(Product.id.in_(product_ids)).with_for_update().all()
+
+
+def lock_products(product_ids):
+    """Lock products rows and return {id: Product} loaded after the lock.
+
+    Rows are locked in id order, the same order reconcile uses, so two
+    writers cannot deadlock. Stock read from the returned objects cannot
+    change until the transaction ends.
+    """
+    ids = sorted(set(product_ids))
+    _sqlite_write_lock()
+    products = {}
+    for chunk in _chunks(ids):
+        products.update((p.id, p) for p in Product.query.filter(Product.id.in_(chunk))
+                        .order_by(Product.id).populate_existing().with_for_update())
+    return products
+
+
+def _chunks(product_ids):
+    """Split ids into CHUNK_SIZE lists, or page through all products."""
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        for i in range(0, len(product_ids), CHUNK_SIZE):
+            yield product_ids[i:i + CHUNK_SIZE]
+        return
+    last = 0
+    while True:
+        ids = [pid for (pid,) in db.session.query(Product.id).filter(Product.id > last)
+               .order_by(Product.id).limit(CHUNK_SIZE)]
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def _base_snapshots(product_ids, as_of=None):
+    """{product_id: StockSnapshot} to start from: the latest snapshot, or
+    the latest one taken at or before `as_of`."""
+    if as_of is None:
+        ids = db.session.query(LatestSnapshot.snapshot_id).filter(
+            LatestSnapshot.product_id.in_(product_ids))
+    else:
+        ids = db.session.query(func.max(StockSnapshot.id)).filter(
+            StockSnapshot.product_id.in_(product_ids), StockSnapshot.as_of <= as_of
+        ).group_by(StockSnapshot.product_id)
+    snaps = StockSnapshot.query.filter(StockSnapshot.id.in_(ids.scalar_subquery()))
+    return {s.product_id: s for s in snaps}
+
+
+def _tails(product_ids, as_of=None):
+    """{product_id: (stock, count, last_id, last_at)} for at most CHUNK_SIZE
+    products: base snapshot plus the movements recorded after it.
+
+    The tail query is driven by the snapshot rows and range-scans
+    (product_id, id > movement_id) per product, so its cost is the tail
+    length, not the ledger size. Products that were never snapshotted
+    have their whole history as tail.
+    """
+    snaps = _base_snapshots(product_ids, as_of)
+    result = {pid: (s.stock, 0, s.movement_id, s.as_of) for pid, s in snaps.items()}
+
+    columns = (
+        InventoryMovement.product_id,
+        func.coalesce(func.sum(InventoryMovement.delta), 0),
+        func.count(InventoryMovement.id),
+        func.max(InventoryMovement.id),
+        func.max(InventoryMovement.created_at),
+    )
+    queries = []
+    if snaps:
+        queries.append(
+            db.session.query(*columns).select_from(StockSnapshot).join(
+                InventoryMovement,
+                and_(InventoryMovement.product_id == StockSnapshot.product_id,
+                     InventoryMovement.id > StockSnapshot.movement_id),
+            ).filter(StockSnapshot.id.in_([s.id for s in snaps.values()]))
+        )
+    never_snapshotted = [pid for pid in product_ids if pid not in snaps]
+    if never_snapshotted:
+        queries.append(db.session.query(*columns).filter(
+            InventoryMovement.product_id.in_(never_snapshotted)))
+
+    for q in queries:
+        if as_of is not None:
+            q = q.filter(InventoryMovement.created_at <= as_of)
+        for pid, delta, count, last_id, last_at in q.group_by(InventoryMovement.product_id):
+            base = result[pid][0] if pid in result else 0
+            result[pid] = (base + int(delta), count, last_id, last_at)
+    return result
+
+
+def _snapshot(tails):
+    """Write a snapshot for every product with a non-empty tail and point
+    latest_stock_snapshots at it. Callers must hold the products locks."""
+    rows = [
+        {'product_id': pid, 'movement_id': last_id, 'stock': stock,
+         'as_of': last_at, 'created_at': datetime.utcnow()}
+        for pid, (stock, count, last_id, last_at) in tails.items() if count
+    ]
+    if not rows:
+        return 0
+    product_ids = [r['product_id'] for r in rows]
+    db.session.execute(insert(StockSnapshot), rows)
+    # executemany does not hand back generated ids; the (product_id, id)
+    # index makes max(id) per product a single seek
+    newest = db.session.query(StockSnapshot.product_id, func.max(StockSnapshot.id)).filter(
+        StockSnapshot.product_id.in_(product_ids)).group_by(StockSnapshot.product_id)
+    latest = [{'product_id': pid, 'snapshot_id': sid} for pid, sid in newest]
+    db.session.query(LatestSnapshot).filter(
+        LatestSnapshot.product_id.in_(product_ids)).delete(synchronize_session=False)
+    db.session.execute(insert(LatestSnapshot), latest)
+    return len(rows)
+
+
+def ledger_stock(product_ids=None, as_of=None):
+    """{product_id: stock} according to the ledger, optionally at a past time."""
+    result = {}
+    for ids in _chunks(product_ids):
+        result.update({pid: t[0] for pid, t in _tails(ids, as_of).items()})
+    return result
+
+
+def reconcile(fix=False):
+    """Compare Product.stock with the ledger, CHUNK_SIZE products at a time.
+
+    Returns a list of (product_id, name, product_stock, ledger_stock).
+    With fix=True an 'adjustment' movement is appended for each mismatch
+    so that the ledger agrees with Product.stock. Products with new
+    movements are then snapshotted, so the next run only reads the
+    movements recorded after this one.
+
+    Each chunk locks its products rows before reading, so it waits for
+    checkouts still writing to them and never snapshots past a movement
+    that has not committed yet. Each chunk commits on its own.
+    """
+    mismatches = []
+    last = 0
+    while True:
+        _sqlite_write_lock()
+        products = db.session.query(Product.id, Product.name, Product.stock).filter(
+            Product.id > last
+        ).order_by(Product.id).limit(CHUNK_SIZE).with_for_update().all()
+        if not products:
+            db.session.commit()
+            return mismatches
+        last = products[-1].id
+
+        ids = [p.id for p in products]
+        tails = _tails(ids)
+        ledger = {pid: t[0] for pid, t in tails.items()}
+        found = [
+            (p.id, p.name, p.stock or 0, ledger.get(p.id, 0))
+            for p in products if (p.stock or 0) != ledger.get(p.id, 0)
+        ]
+        if fix and found:
+            record_movements([
+                movement(pid, ADJUSTMENT, stock - expected, 'reconcile')
+                for pid, _, stock, expected in found
+            ])
+            tails = _tails(ids)
+        _snapshot(tails)
+        db.session.commit()
+        mismatches += found
+
+
+@click.command('reconcile-inventory')
+@click.option('--fix', is_flag=True, help='Append adjustment movements for mismatches.')
+@with_appcontext
+def reconcile_inventory_command(fix):
+    """Check Product.stock against the inventory ledger and snapshot it."""
+    mismatches = reconcile(fix=fix)
+    for pid, name, stock, expected in mismatches:
+        print(f"⚠️ Product {pid} ({name}): stock={stock} ledger={expected}")
+    if not mismatches:
+        print("✅ Inventory matches the ledger")
+    elif fix:
+        print(f"✅ Recorded {len(mismatches)} adjustment(s)")
+    else:
+        raise SystemExit(1)
@@ -22,7 +22,7 @@ class User(db.Model):
 class Product(db.Model):
     __tablename__ = 'products'
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(255), nullable=False)
+    name = db.Column(db.String(255), nullable=False, index=True)
     category = db.Column(db.String(100))
     price = db.Column(db.Numeric(12,2), default=0)
     stock = db.Column(db.Integer, default=0)
@@ -83,4 +83,46 @@ class Wishlist(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Ensure unique wishlist items per user
-    __table_args__ = (db.UniqueConstraint('user_id', 'product_id', name='unique_wishlist_item'),)
\ No newline at end of file
+    __table_args__ = (db.UniqueConstraint('user_id', 'product_id', name='unique_wishlist_item'),)
+
+class InventoryMovement(db.Model):
+    """Append-only stock ledger. Rows are never updated or deleted;
+    corrections are recorded as new 'adjustment' movements."""
+    __tablename__ = 'inventory_movements'
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # 'purchase', 'refund', 'restock', 'adjustment'
+    delta = db.Column(db.Integer, nullable=False)  # signed change to stock
+    reference = db.Column(db.String(100))  # e.g. 'order:42'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_inventory_movements_product_id_id', 'product_id', 'id'),)
+
+class StockSnapshot(db.Model):
+    """Stock level of a product after all movements up to `movement_id`."""
+    __tablename__ = 'stock_snapshots'
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    movement_id = db.Column(db.Integer, db.ForeignKey('inventory_movements.id'), nullable=False)
+    stock = db.Column(db.Integer, nullable=False)
+    as_of = db.Column(db.DateTime, nullable=False)  # created_at of movement_id
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_stock_snapshots_product_id_id', 'product_id', 'id'),)
+
+class LatestSnapshot(db.Model):
+    """One row per product pointing at its newest stock_snapshots row, so
+    reconciliation starts from it without grouping the snapshot history."""
+    __tablename__ = 'latest_stock_snapshots'
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    snapshot_id = db.Column(db.Integer, db.ForeignKey('stock_snapshots.id'), nullable=False)
+
+class ProductFacet(db.Model):
+    """Number of products per facet value, kept in sync by facets.py.
+    `category` is '' for counts over the whole catalog, otherwise the
+    counts only cover that category."""
+    __tablename__ = 'product_facets'
+    category = db.Column(db.String(100), primary_key=True, default='')
+    facet = db.Column(db.String(20), primary_key=True)  # 'category', 'featured', 'is_new', 'in_stock', 'price'
+    value = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
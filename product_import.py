@@ -0,0 +1,301 @@
+import codecs
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from db import db
+from models import Product
+import facets
+import inventory
+
+# ----------------------------
+# BULK PRODUCT IMPORT
+# - rows are read from a CSV or NDJSON stream and handled CHUNK_SIZE at a
+#   time: validate, resolve keys, upsert, update facets and ledger, commit
+# - each chunk is its own short transaction, so a large import never
+#   holds locks on products for the whole run
+# ----------------------------
+CHUNK_SIZE = 1000
+
+
+def _text(max_len=None):
+    def convert(value):
+        value = str(value).strip()
+        if max_len and len(value) > max_len:
+            raise ValueError(f'must be at most {max_len} characters')
+        return value
+    return convert
+
+
+def _count(value):
+    if isinstance(value, bool):
+        raise ValueError('must be a whole number')
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError('must be a whole number')
+    if number < 0:
+        raise ValueError('must not be negative')
+    return number
+
+
+def _price(value):
+    if isinstance(value, bool):
+        raise ValueError('must be a number')
+    try:
+        price = Decimal(str(value).strip()).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError('must be a number')
+    if price < 0 or price >= Decimal('1e10'):
+        raise ValueError('must be between 0 and 9999999999.99')
+    return price
+
+
+def _flag(value):
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 'yes', 'y'):
+        return True
+    if text in ('0', 'false', 'no', 'n'):
+        return False
+    raise ValueError('must be true or false')
+
+
+FIELDS = {
+    'id': _count,
+    'name': _text(255),
+    'category': _text(100),
+    'price': _price,
+    'stock': _count,
+    'dimensions': _text(255),
+    'description': _text(),
+    'image': _text(512),
+    'threshold': _count,
+    'featured': _flag,
+    'is_new': _flag,
+}
+
+# values a brand-new product gets for columns the import leaves out
+NEW_PRODUCT_DEFAULTS = {'category': None, 'price': Decimal('0'), 'stock': 0,
+                        'featured': False, 'is_new': False}
+
+
+def _decode_lines(stream, bad_lines):
+    """Decode a byte stream one line at a time. A line that is not UTF-8
+    is recorded in `bad_lines` and passed on with replacement characters,
+    so one bad byte does not end the import."""
+    for number, raw in enumerate(stream, start=1):
+        if number == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode('utf-8')
+        except UnicodeDecodeError as e:
+            bad_lines[number] = f'invalid UTF-8 at byte {e.start}'
+            yield raw.decode('utf-8', errors='replace')
+
+
+def _read_csv(lines, bad_lines):
+    reader = csv.DictReader(lines)
+    while True:
+        first = reader.line_num + 1
+        try:
+            raw = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, f'invalid CSV: {e}'
+            continue
+        # a quoted field can span several physical lines
+        bad = [bad_lines[n] for n in range(first, reader.line_num + 1) if n in bad_lines]
+        yield reader.line_num, bad[0] if bad else raw
+
+
+def read_rows(stream, fmt):
+    """Yield (line, dict) pairs, or (line, error message) for unparsable lines."""
+    bad_lines = {}
+    lines = _decode_lines(stream, bad_lines)
+    if fmt == 'csv':
+        yield from _read_csv(lines, bad_lines)
+        return
+    for line, raw in enumerate(lines, start=1):
+        if line in bad_lines:
+            yield line, bad_lines[line]
+            continue
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            yield line, f'invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield line, 'each line must be a JSON object'
+            continue
+        yield line, record
+
+
+def validate(records):
+    """Validate a chunk one column at a time.
+
+    Returns (rows, errors): rows is a list of (line, cleaned dict) and
+    errors maps line -> list of messages. Empty values mean "leave as is".
+    """
+    errors = {}
+    cleaned = [{} for _ in records]
+    unparsed = set()
+    for line, raw in records:
+        if isinstance(raw, str):
+            errors[line] = [raw]
+            unparsed.add(line)
+    for field, convert in FIELDS.items():
+        for i, (line, raw) in enumerate(records):
+            if line in unparsed:
+                continue
+            value = raw.get(field)
+            if value is None or value == '':
+                continue
+            try:
+                cleaned[i][field] = convert(value)
+            except ValueError as e:
+                errors.setdefault(line, []).append(f'{field}: {e}')
+
+    rows, seen = [], {}
+    for (line, _), row in zip(records, cleaned):
+        if line in errors:
+            continue
+        if 'id' not in row and not row.get('name'):
+            errors[line] = ['id or name is required']
+            continue
+        key = ('id', row['id']) if 'id' in row else ('name', row['name'])
+        if key in seen:
+            errors[line] = [f'duplicate {key[0]} {key[1]!r} (also on line {seen[key]})']
+            continue
+        seen[key] = line
+        rows.append((line, row))
+    return rows, errors
+
+
+def _upsert(rows):
+    """INSERT ... ON DUPLICATE KEY UPDATE on the primary key, one
+    executemany per distinct column set."""
+    table = Product.__table__
+    connection = db.session.connection()
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    for columns, group in groups.items():
+        updated = [c for c in columns if c != 'id']
+        if connection.dialect.name == 'mysql':
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            stmt = mysql_insert(table)
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in updated})
+        elif connection.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            stmt = sqlite_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['id'], set_={c: stmt.excluded[c] for c in updated}
+            )
+        else:
+            raise RuntimeError(f'Bulk import is not supported on {connection.dialect.name}')
+        connection.execute(stmt, group)
+
+
+def apply_chunk(rows, errors):
+    """Write one validated chunk. Returns (inserted, updated)."""
+    ids = [r['id'] for _, r in rows if 'id' in r]
+    names = [r['name'] for _, r in rows if 'id' not in r]
+    columns = (Product.id, Product.name) + tuple(getattr(Product, f) for f in facets.FACET_FIELDS)
+    # lock just this chunk's rows (via the primary key and ix_products_name)
+    # so a concurrent checkout cannot change stock between this read and
+    # the upsert; separate queries keep each lookup on its own index
+    existing = []
+    for column, keys in ((Product.id, ids), (Product.name, names)):
+        if keys:
+            existing += db.session.query(*columns).filter(column.in_(keys)).with_for_update().all()
+    by_id, by_name = {}, {}
+    for p in sorted(existing, key=lambda p: p.id, reverse=True):
+        by_id[p.id] = p._asdict()
+        by_name[p.name] = by_id[p.id]  # lowest id wins for duplicate names
+
+    writes, old_rows, new_rows, movements, new_names = [], [], [], [], []
+    claimed = {}  # product id -> line that updates it
+    for line, row in rows:
+        current = by_id.get(row['id']) if 'id' in row else by_name.get(row['name'])
+        if current is None:
+            if not row.get('name'):
+                errors[line] = ['name is required for new products']
+                continue
+            after = dict(NEW_PRODUCT_DEFAULTS, **row)
+            writes.append(after)
+            new_rows.append(after)
+            if 'id' in row:
+                movements.append(inventory.movement(row['id'], inventory.RESTOCK, after['stock'], 'import'))
+            else:
+                new_names.append((row['name'], after['stock']))
+            continue
+        if current['id'] in claimed:
+            # e.g. one row keyed by id and another by the same product's name
+            errors[line] = [f"product {current['id']} is already updated on line {claimed[current['id']]}"]
+            continue
+        claimed[current['id']] = line
+        # name keeps the INSERT half of the upsert valid (NOT NULL)
+        row = {'name': current['name'], **row, 'id': current['id']}
+        writes.append(row)
+        old_rows.append(current)
+        new_rows.append(dict(current, **row))
+        delta = row.get('stock', current['stock'] or 0) - (current['stock'] or 0)
+        kind = inventory.RESTOCK if delta > 0 else inventory.ADJUSTMENT
+        movements.append(inventory.movement(current['id'], kind, delta, 'import'))
+
+    if not writes:
+        return 0, 0
+    _upsert(writes)
+
+    if new_names:
+        # executemany does not hand back generated ids; look them up by name
+        created = dict(db.session.query(Product.name, Product.id).filter(
+            Product.name.in_([n for n, _ in new_names]), Product.id.notin_(list(by_id))
+        ))
+        movements += [inventory.movement(created[n], inventory.RESTOCK, stock, 'import')
+                      for n, stock in new_names if n in created]
+
+    facets.apply_changes(db.session.connection(), old_rows, new_rows)
+    inventory.record_movements(movements)
+    db.session.commit()
+    return len(writes) - len(old_rows), len(old_rows)
+
+
+def import_products(stream, fmt, chunk_size=CHUNK_SIZE):
+    """Upsert products from a CSV/NDJSON stream, committing per chunk.
+
+    If reading the stream fails part way, the chunks already committed
+    stay committed and the result says where the import stopped.
+    """
+    result = {'inserted': 0, 'updated': 0, 'errors': [], 'complete': True}
+
+    def flush(records):
+        rows, errors = validate(records)
+        try:
+            inserted, updated = apply_chunk(rows, errors)
+            result['inserted'] += inserted
+            result['updated'] += updated
+        except Exception as e:
+            db.session.rollback()
+            print("❌ Import chunk error:", repr(e))
+            for line, _ in rows:
+                if line not in errors:
+                    errors[line] = [f'not saved: {e}']
+        result['errors'] += [{'line': line, 'errors': msgs} for line, msgs in sorted(errors.items())]
+
+    chunk = []
+    try:
+        for record in read_rows(stream, fmt):
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+    except Exception as e:
+        print("❌ Import stream error:", repr(e))
+        result['complete'] = False
+        result['errors'].append({'line': None, 'errors': [f'import stopped: {e}']})
+    if chunk:
+        flush(chunk)
+    return result
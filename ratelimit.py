@@ -0,0 +1,227 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+# ----------------------------
+# RATE LIMITING
+# - token buckets per (route, IP) and, when a valid token is sent, per
+#   (route, JWT subject); a request is rejected when either is empty
+# - buckets live in a backend: 'memory' (per process) or
+#   'sqlite:///path/to/file.db' (shared by every worker on the host)
+# ----------------------------
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+
+def parse_rate(rate):
+    """'10/minute' -> (10, 60)"""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period.strip()]
+
+
+def refill(tokens, updated, now, per_second, capacity):
+    return min(capacity, tokens + (now - updated) * per_second)
+
+
+class MemoryBackend:
+    """Buckets in an LRU dict; only limits within one worker process.
+
+    Past MAX_KEYS the least recently used bucket is dropped, which costs
+    O(1) per request no matter how many clients are active.
+    """
+
+    MAX_KEYS = 10000
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, per_second, capacity):
+        """Take one token. Returns seconds to wait, or 0 if allowed."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = refill(tokens, updated, now, per_second, capacity)
+            wait = 0 if tokens >= 1 else (1 - tokens) / per_second
+            self._buckets[key] = (tokens - 1 if not wait else tokens, now)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class SQLiteBackend:
+    """Buckets in a local SQLite file so several workers share budgets.
+
+    Every PURGE_EVERY seconds a worker deletes the buckets that have
+    refilled completely, so the table only holds recently active clients.
+    """
+
+    PURGE_EVERY = 60
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._next_purge = time.time() + self.PURGE_EVERY
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, "
+                "per_second REAL NOT NULL, capacity REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, per_second, capacity):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT tokens, updated FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            tokens = refill(*row, now, per_second, capacity) if row else capacity
+            wait = 0 if tokens >= 1 else (1 - tokens) / per_second
+            conn.execute(
+                'INSERT INTO rate_limits (key, tokens, updated, per_second, capacity) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                (key, tokens - 1 if not wait else tokens, now, per_second, capacity),
+            )
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            # fail open: a busy limiter store must not take the site down
+            print("⚠️ Rate limit backend error:", repr(e))
+            return 0
+        if now >= self._next_purge:
+            self.purge(now)
+        return wait
+
+    def purge(self, now=None):
+        """Delete buckets that have refilled, i.e. are the same as no row."""
+        now = time.time() if now is None else now
+        self._next_purge = now + self.PURGE_EVERY
+        try:
+            self._connect().execute(
+                'DELETE FROM rate_limits WHERE tokens + (? - updated) * per_second >= capacity',
+                (now,),
+            )
+        except sqlite3.Error as e:
+            print("⚠️ Rate limit purge error:", repr(e))
+
+
+def backend_from_uri(uri):
+    if uri == 'memory':
+        return MemoryBackend()
+    if uri.startswith('sqlite:///'):
+        return SQLiteBackend(uri[len('sqlite:///'):])
+    raise ValueError(f'Unsupported RATELIMIT_STORAGE: {uri}')
+
+
+def client_keys():
+    """Buckets a request is charged to: always its IP, plus the JWT subject
+    when a valid token is sent. A token therefore never buys an IP a
+    fresh budget, and one user cannot dodge limits by switching IPs."""
+    keys = [f'ip:{request.remote_addr}']
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        # invalid/expired tokens are reported by the view itself
+        identity = None
+    if identity is not None:
+        keys.append(f'user:{identity}')
+    return keys
+
+
+class _State:
+    """Per-app limiter state, kept in app.extensions['ratelimiter']."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+
+class RateLimiter:
+    """Flask extension: per-route token buckets plus in-flight load shedding.
+
+    Config:
+      RATELIMIT_ENABLED   turn limits off (e.g. for tests), default True
+      RATELIMIT_STORAGE   'memory' or 'sqlite:///path', default 'memory'
+      MAX_IN_FLIGHT       concurrent requests per worker before answering
+                          503; 0 disables load shedding
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE', 'memory')
+        app.config.setdefault('MAX_IN_FLIGHT', 0)
+        app.extensions['ratelimiter'] = _State(backend_from_uri(app.config['RATELIMIT_STORAGE']))
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    # ----------------------------
+    # LOAD SHEDDING
+    # ----------------------------
+    def _admit(self):
+        limit = current_app.config['MAX_IN_FLIGHT']
+        if not limit:
+            return None
+        state = current_app.extensions['ratelimiter']
+        with state.lock:
+            if state.in_flight >= limit:
+                shed = True
+            else:
+                state.in_flight += 1
+                shed = False
+        if shed:
+            resp = jsonify({'msg': 'Server is busy. Please try again shortly.'})
+            resp.headers['Retry-After'] = '1'
+            return resp, 503
+        g.rate_limiter_admitted = True
+        return None
+
+    def _release(self, _exc=None):
+        if g.pop('rate_limiter_admitted', False):
+            state = current_app.extensions['ratelimiter']
+            with state.lock:
+                state.in_flight -= 1
+
+    # ----------------------------
+    # PER-ROUTE BUDGETS
+    # ----------------------------
+    def limit(self, rate, burst=None):
+        """Decorator: allow `rate` (e.g. '5/minute') per client, with bursts
+        of up to `burst` requests (defaults to the count in `rate`)."""
+        count, period = parse_rate(rate)
+        per_second = count / period
+        capacity = burst or count
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if current_app.config['RATELIMIT_ENABLED']:
+                    backend = current_app.extensions['ratelimiter'].backend
+                    wait = 0
+                    for key in client_keys():
+                        wait = backend.take(f'{request.endpoint}:{key}', per_second, capacity)
+                        if wait:
+                            break
+                    if wait:
+                        resp = jsonify({'msg': 'Too many requests. Please try again later.'})
+                        resp.headers['Retry-After'] = str(int(wait) + 1)
+                        return resp, 429
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
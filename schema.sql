@@ -23,7 +23,8 @@ CREATE TABLE products (
   threshold INT DEFAULT 10,
   featured TINYINT(1) DEFAULT 0,
   is_new TINYINT(1) DEFAULT 0,
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX ix_products_name (name)
 );
 
 CREATE TABLE orders (
@@ -75,6 +76,44 @@ CREATE TABLE wishlists (
   UNIQUE KEY unique_wishlist_item (user_id, product_id)
 );
 
+CREATE TABLE inventory_movements (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  product_id INT NOT NULL,
+  kind VARCHAR(20) NOT NULL,
+  delta INT NOT NULL,
+  reference VARCHAR(100),
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+  INDEX ix_inventory_movements_product_id_id (product_id, id)
+);
+
+CREATE TABLE stock_snapshots (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  product_id INT NOT NULL,
+  movement_id INT NOT NULL,
+  stock INT NOT NULL,
+  as_of DATETIME NOT NULL,
+  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+  FOREIGN KEY (movement_id) REFERENCES inventory_movements(id) ON DELETE CASCADE,
+  INDEX ix_stock_snapshots_product_id_id (product_id, id)
+);
+
+CREATE TABLE latest_stock_snapshots (
+  product_id INT PRIMARY KEY,
+  snapshot_id INT NOT NULL,
+  FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE,
+  FOREIGN KEY (snapshot_id) REFERENCES stock_snapshots(id) ON DELETE CASCADE
+);
+
+CREATE TABLE product_facets (
+  category VARCHAR(100) NOT NULL DEFAULT '',
+  facet VARCHAR(20) NOT NULL,
+  value VARCHAR(100) NOT NULL,
+  count INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (category, facet, value)
+);
+
 -- Insert sample data
 INSERT INTO products (name, category, price, stock, dimensions, description, image, featured, is_new) VALUES
 ('Modern Wooden Chair', 'Chairs', 129.99, 25, '18" x 20" x 32"', 'Comfortable modern wooden chair with ergonomic design.', '/images/chair1.jpg', 1, 1),
@@ -82,6 +121,10 @@ INSERT INTO products (name, category, price, stock, dimensions, description, ima
 ('Coffee Table', 'Tables', 199.99, 15, '48" x 24" x 18"', 'Elegant coffee table with glass top and wooden legs.', '/images/table1.jpg', 0, 1),
 ('Bookshelf', 'Storage', 299.99, 8, '36" x 12" x 72"', 'Tall bookshelf with 5 shelves for ample storage.', '/images/bookshelf1.jpg', 1, 0);
 
+-- Opening balances for the inventory ledger
+INSERT INTO inventory_movements (product_id, kind, delta, reference)
+SELECT id, 'restock', stock, 'setup' FROM products;
+
 -- Create admin user (password: admin123)
 INSERT INTO users (full_name, username, email, password_hash, is_admin) VALUES
 ('Administrator', 'admin', 'admin@furniturehaven.com', '$2b$12$LQv3c1yqBNWR1IuH6qQAhOQYxx6cTZ.KY9bK7xHj3K9J2J2y2y2y2', 1);
\ No newline at end of file
@@ -0,0 +1,26 @@
+import pytest
+from app import create_app
+from db import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    # a file database, so tests can open a second connection from a thread
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATELIMIT_ENABLED': False,
+        'MAX_IN_FLIGHT': 0,
+        'BCRYPT_LOG_ROUNDS': 4,
+        'JWT_SECRET_KEY': 'test-secret-key-long-enough-for-hs256',
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,75 @@
+from db import db
+from models import Product, ProductFacet
+import facets
+
+
+def facet_rows():
+    return sorted((f.category, f.facet, f.value, f.count)
+                  for f in ProductFacet.query.filter(ProductFacet.count > 0))
+
+
+def test_facets_follow_product_writes(app, client):
+    with app.app_context():
+        db.session.add_all([
+            Product(name='Sofa', category='Living Room', price=12000, stock=3, featured=True),
+            Product(name='Chair', category='Living Room', price=800, stock=0),
+            Product(name='Desk', category='Office', price=4500, stock=2, is_new=True),
+        ])
+        db.session.commit()
+
+    body = client.get('/api/products/facets').get_json()
+    assert body['category'] is None
+    assert body['facets']['category'] == {'Living Room': 2, 'Office': 1}
+    assert body['facets']['in_stock'] == {'true': 2, 'false': 1}
+    assert body['facets']['price'] == {'0-1000': 1, '1000-5000': 1, '10000-20000': 1}
+
+    body = client.get('/api/products/facets?category=Living Room').get_json()
+    assert body['facets'] == {
+        'category': {'Living Room': 2},
+        'featured': {'true': 1, 'false': 1},
+        'is_new': {'false': 2},
+        'in_stock': {'true': 1, 'false': 1},
+        'price': {'0-1000': 1, '10000-20000': 1},
+    }
+
+    with app.app_context():
+        chair = Product.query.filter_by(name='Chair').one()
+        chair.category = 'Office'
+        chair.stock = 5
+        db.session.delete(Product.query.filter_by(name='Desk').one())
+        db.session.commit()
+
+    body = client.get('/api/products/facets?category=Office').get_json()
+    assert body['facets']['in_stock'] == {'true': 1}
+    assert body['facets']['price'] == {'0-1000': 1}
+
+    with app.app_context():
+        incremental = facet_rows()
+        facets.rebuild()
+        assert facet_rows() == incremental
+
+
+def test_unknown_category_has_no_counts(client):
+    body = client.get('/api/products/facets?category=Garden').get_json()
+    assert all(counts == {} for counts in body['facets'].values())
+
+
+def test_facets_follow_writes_to_expired_products(app):
+    with app.app_context():
+        db.session.add(Product(name='Lamp', category='X', price=50, stock=1))
+        db.session.commit()
+
+        lamp = Product.query.filter_by(name='Lamp').one()
+        db.session.commit()  # expires lamp; the next assignment does not read it first
+        lamp.category = 'Y'
+        lamp.stock = 0
+        db.session.commit()
+        assert facets.get_facets()['category'] == {'Y': 1}
+
+        moved = facet_rows()
+        facets.rebuild()
+        assert facet_rows() == moved
+
+        db.session.delete(lamp)
+        db.session.commit()
+        assert ProductFacet.query.filter(ProductFacet.count != 0).count() == 0
@@ -0,0 +1,143 @@
+import threading
+from datetime import datetime, timedelta
+from db import db
+from models import Product, LatestSnapshot, StockSnapshot
+import inventory
+
+
+def add_product(stock, name='Chair'):
+    product = Product(name=name, stock=stock)
+    db.session.add(product)
+    db.session.flush()
+    inventory.record_movements([inventory.movement(product.id, inventory.RESTOCK, stock)])
+    db.session.commit()
+    return product.id
+
+
+def purchase(product_id, qty):
+    product = inventory.lock_products([product_id])[product_id]
+    product.stock -= qty
+    inventory.record_movements([inventory.movement(product_id, inventory.PURCHASE, -qty)])
+
+
+def test_reconcile_snapshots_and_reads_only_new_movements(app):
+    with app.app_context():
+        pid = add_product(10)
+        assert inventory.reconcile() == []
+        snapshot = db.session.get(StockSnapshot, db.session.get(LatestSnapshot, pid).snapshot_id)
+        assert snapshot.stock == 10
+
+        purchase(pid, 3)
+        db.session.commit()
+        assert inventory.ledger_stock([pid]) == {pid: 7}
+        assert inventory.reconcile() == []
+        assert StockSnapshot.query.filter_by(product_id=pid).count() == 2
+
+        # nothing new: no further snapshot
+        assert inventory.reconcile() == []
+        assert StockSnapshot.query.filter_by(product_id=pid).count() == 2
+
+
+def test_reconcile_reports_and_fixes_drift(app):
+    with app.app_context():
+        pid = add_product(5)
+        db.session.get(Product, pid).stock = 8
+        db.session.commit()
+
+        assert inventory.reconcile() == [(pid, 'Chair', 8, 5)]
+        assert inventory.reconcile(fix=True) == [(pid, 'Chair', 8, 5)]
+        assert inventory.reconcile() == []
+        assert inventory.ledger_stock() == {pid: 8}
+
+
+def test_ledger_stock_as_of(app):
+    with app.app_context():
+        pid = add_product(10)
+        inventory.reconcile()
+        before = datetime.utcnow()
+        purchase(pid, 4)
+        db.session.commit()
+        inventory.reconcile()
+
+        assert inventory.ledger_stock([pid]) == {pid: 6}
+        assert inventory.ledger_stock([pid], as_of=before) == {pid: 10}
+        assert inventory.ledger_stock([pid], as_of=before - timedelta(days=1)) == {}
+
+
+def test_reconcile_waits_for_uncommitted_checkout(app):
+    with app.app_context():
+        pid = add_product(10)
+        inventory.reconcile()
+
+    written, release = threading.Event(), threading.Event()
+    results = {}
+
+    def checkout():
+        with app.app_context():
+            purchase(pid, 1)
+            db.session.flush()
+            written.set()
+            release.wait(5)
+            db.session.commit()
+
+    def reconcile():
+        with app.app_context():
+            results['mismatches'] = inventory.reconcile()
+
+    buyer = threading.Thread(target=checkout)
+    buyer.start()
+    assert written.wait(5)
+
+    # the checkout's movement is written but not committed; reconcile must
+    # not snapshot past it
+    reconciler = threading.Thread(target=reconcile)
+    reconciler.start()
+    reconciler.join(0.5)
+    assert reconciler.is_alive()
+
+    release.set()
+    buyer.join(5)
+    reconciler.join(5)
+    assert not reconciler.is_alive()
+
+    with app.app_context():
+        assert results['mismatches'] == []
+        assert inventory.ledger_stock([pid]) == {pid: 9}
+        snapshot = db.session.get(StockSnapshot, db.session.get(LatestSnapshot, pid).snapshot_id)
+        assert snapshot.stock == 9
+        assert inventory.reconcile() == []
+
+
+def test_concurrent_checkouts_cannot_oversell(app):
+    with app.app_context():
+        pid = add_product(1)
+
+    locked, release = threading.Event(), threading.Event()
+    seen = {}
+
+    def first():
+        with app.app_context():
+            purchase(pid, 1)
+            locked.set()
+            release.wait(5)
+            db.session.commit()
+
+    def second():
+        with app.app_context():
+            seen['stock'] = inventory.lock_products([pid])[pid].stock
+            db.session.rollback()
+
+    buyer = threading.Thread(target=first)
+    buyer.start()
+    assert locked.wait(5)
+
+    # the second checkout must wait for the first one's stock change
+    other = threading.Thread(target=second)
+    other.start()
+    other.join(0.5)
+    assert other.is_alive()
+
+    release.set()
+    buyer.join(5)
+    other.join(5)
+    assert seen['stock'] == 0
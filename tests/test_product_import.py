@@ -0,0 +1,166 @@
+import io
+import json
+import pytest
+from db import db
+from extensions import bcrypt
+from models import Product, ProductFacet, User
+import facets
+import inventory
+import product_import
+
+
+def login(client, app, is_admin):
+    with app.app_context():
+        username = 'admin' if is_admin else 'shopper'
+        db.session.add(User(username=username, email=f'{username}@example.com', is_admin=is_admin,
+                            password_hash=bcrypt.generate_password_hash('pw').decode('utf-8')))
+        db.session.commit()
+    token = client.post('/api/auth/login', json={'username': username, 'password': 'pw'}).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def admin(client, app):
+    return login(client, app, is_admin=True)
+
+
+@pytest.fixture
+def catalog(app):
+    with app.app_context():
+        db.session.add_all([
+            Product(name='Luxury Sofa', category='Living Room', price=12999.99, stock=10),
+            Product(name='Modern Chair', category='Living Room', price=8999.99, stock=20,
+                    description='A stylish chair.'),
+        ])
+        db.session.flush()
+        inventory.record_movements([
+            inventory.movement(p.id, inventory.RESTOCK, p.stock) for p in Product.query
+        ])
+        db.session.commit()
+
+
+def post_ndjson(client, headers, rows):
+    body = '\n'.join(r if isinstance(r, str) else json.dumps(r) for r in rows)
+    return client.post('/api/admin/products/import', data=body,
+                       content_type='application/x-ndjson', headers=headers).get_json()
+
+
+def assert_ledger_and_facets_consistent():
+    assert inventory.reconcile() == []
+    incremental = sorted((f.category, f.facet, f.value, f.count)
+                         for f in ProductFacet.query.filter(ProductFacet.count > 0))
+    facets.rebuild()
+    assert incremental == sorted((f.category, f.facet, f.value, f.count)
+                                 for f in ProductFacet.query.filter(ProductFacet.count > 0))
+
+
+def test_requires_admin_and_supported_format(client, app, admin):
+    shopper = login(client, app, is_admin=False)
+    assert client.post('/api/admin/products/import', data='', content_type='text/csv',
+                       headers=shopper).status_code == 403
+    assert client.post('/api/admin/products/import', data='', content_type='text/plain',
+                       headers=admin).status_code == 415
+
+
+def test_csv_matches_on_id_then_name_and_updates_given_fields(client, app, admin, catalog):
+    body = (
+        'id,name,category,price,stock,featured\n'
+        '1,,Sofas,,4,\n'               # by id: category and stock only
+        ',Modern Chair,,7999.5,,yes\n'  # by name: price and featured only
+        ',Floor Lamp,Lighting,99,7,\n'  # new product
+    )
+    result = client.post('/api/admin/products/import', data=body, content_type='text/csv',
+                         headers=admin).get_json()
+    assert result['complete'] is True
+    assert (result['inserted'], result['updated'], result['errors']) == (1, 2, [])
+
+    with app.app_context():
+        sofa, chair, lamp = Product.query.order_by(Product.id)
+        assert (sofa.name, sofa.category, float(sofa.price), sofa.stock) == \
+            ('Luxury Sofa', 'Sofas', 12999.99, 4)
+        assert (chair.category, float(chair.price), chair.stock, chair.featured, chair.description) == \
+            ('Living Room', 7999.5, 20, True, 'A stylish chair.')
+        assert (lamp.category, lamp.stock, lamp.threshold) == ('Lighting', 7, 10)
+        assert inventory.ledger_stock() == {1: 4, 2: 20, 3: 7}
+        assert_ledger_and_facets_consistent()
+
+
+def test_rows_resolving_to_the_same_product_are_rejected(client, app, admin, catalog):
+    result = post_ndjson(client, admin, [
+        {'id': 1, 'stock': 30, 'category': 'A'},
+        {'name': 'Luxury Sofa', 'stock': 30, 'category': 'B'},
+    ])
+    assert result['updated'] == 1
+    assert result['errors'] == [{'line': 2, 'errors': ['product 1 is already updated on line 1']}]
+
+    with app.app_context():
+        assert db.session.get(Product, 1).category == 'A'
+        assert inventory.ledger_stock([1]) == {1: 30}
+        assert facets.get_facets()['category'] == {'A': 1, 'Living Room': 1}
+        assert_ledger_and_facets_consistent()
+
+
+def test_every_field_error_on_a_line_is_reported(client, admin):
+    result = post_ndjson(client, admin, [
+        {'name': 'z', 'price': 'x', 'stock': -1, 'featured': 'maybe'},
+        {'category': 'No key'},
+        'not json',
+        '[1, 2]',
+    ])
+    assert result['inserted'] == 0
+    assert result['errors'] == [
+        {'line': 1, 'errors': ['price: must be a number', 'stock: must not be negative',
+                               'featured: must be true or false']},
+        {'line': 2, 'errors': ['id or name is required']},
+        {'line': 3, 'errors': ['invalid JSON: Expecting value: line 1 column 1 (char 0)']},
+        {'line': 4, 'errors': ['each line must be a JSON object']},
+    ]
+
+
+@pytest.mark.parametrize('fmt, body', [
+    ('ndjson', b'{"name": "Stool", "stock": 1}\n{"name": "Bad \xff"}\n{"name": "Bench", "stock": 2}\n'),
+    ('csv', b'name,stock\nStool,1\nBad \xff,3\nBench,2\n'),
+])
+def test_undecodable_line_is_a_row_error(app, fmt, body):
+    with app.app_context():
+        result = product_import.import_products(io.BytesIO(body), fmt)
+        bad_line = 2 if fmt == 'ndjson' else 3
+        assert result['complete'] is True
+        assert result['inserted'] == 2
+        assert result['errors'] == [{'line': bad_line, 'errors': ['invalid UTF-8 at byte 14' if fmt == 'ndjson'
+                                                                  else 'invalid UTF-8 at byte 4']}]
+        assert sorted(p.name for p in Product.query) == ['Bench', 'Stool']
+
+
+def test_chunks_commit_separately_and_stay_consistent(app, catalog):
+    rows = [
+        {'name': 'Stool', 'category': 'Office', 'stock': 5},
+        {'id': 2, 'stock': 0},
+        {'name': 'Desk', 'price': 'cheap'},
+        {'name': 'Stool', 'stock': 9, 'is_new': True},  # next chunk: updates the row above
+        {'name': 'Shelf', 'category': 'Office', 'price': 250},
+    ]
+    body = '\n'.join(json.dumps(r) for r in rows).encode()
+    with app.app_context():
+        result = product_import.import_products(io.BytesIO(body), 'ndjson', chunk_size=2)
+        assert (result['inserted'], result['updated']) == (2, 2)
+        assert result['errors'] == [{'line': 3, 'errors': ['price: must be a number']}]
+
+        stool = Product.query.filter_by(name='Stool').one()
+        assert (stool.stock, stool.is_new, stool.category) == (9, True, 'Office')
+        assert facets.get_facets('Office')['in_stock'] == {'true': 1, 'false': 1}
+        assert_ledger_and_facets_consistent()
+
+
+def test_stream_failure_keeps_committed_chunks(app, monkeypatch):
+    def broken(stream, fmt):
+        yield 1, {'name': 'Stool'}
+        yield 2, {'name': 'Bench'}
+        raise OSError('connection reset')
+
+    monkeypatch.setattr(product_import, 'read_rows', broken)
+    with app.app_context():
+        result = product_import.import_products(io.BytesIO(b''), 'ndjson', chunk_size=1)
+        assert result['complete'] is False
+        assert result['inserted'] == 2
+        assert result['errors'] == [{'line': None, 'errors': ['import stopped: connection reset']}]
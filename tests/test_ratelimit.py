@@ -0,0 +1,81 @@
+from flask_jwt_extended import create_access_token
+from app import create_app
+from db import db
+from models import User
+from ratelimit import MemoryBackend, SQLiteBackend
+
+
+def test_memory_backend_evicts_least_recently_used_only():
+    backend = MemoryBackend()
+    backend.MAX_KEYS = 2
+    assert backend.take('login:a', 1 / 6, 10) == 0
+    assert backend.take('seed:b', 1 / 30, 2) == 0
+    assert backend.take('login:a', 1 / 6, 10) == 0
+    backend.take('seed:c', 1 / 30, 2)  # over MAX_KEYS: 'seed:b' goes
+
+    assert list(backend._buckets) == ['login:a', 'seed:c']
+    tokens, _ = backend._buckets['login:a']
+    assert 7.9 < tokens < 8.1  # login budget was not reset
+
+
+def test_sqlite_backend_purges_refilled_buckets(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'limits.db'))
+    backend.take('login:idle', 1.0, 2)
+    backend.take('login:busy', 0.001, 2)
+    backend.take('login:busy', 0.001, 2)
+
+    def keys():
+        return [k for (k,) in backend._connect().execute('SELECT key FROM rate_limits ORDER BY key')]
+
+    backend.purge()
+    assert keys() == ['login:busy', 'login:idle']
+
+    # 5s later the 1 token/s bucket is full again, the slow one is not
+    last = backend._connect().execute('SELECT max(updated) FROM rate_limits').fetchone()[0]
+    backend.purge(last + 5)
+    assert keys() == ['login:busy']
+
+
+def test_apps_keep_separate_limiter_state(tmp_path):
+    first = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'MAX_IN_FLIGHT': 1})
+    second = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'MAX_IN_FLIGHT': 1})
+    assert first.extensions['ratelimiter'].backend is not second.extensions['ratelimiter'].backend
+
+    first.extensions['ratelimiter'].in_flight = 1
+    assert first.test_client().get('/api/ping').status_code == 503
+    assert second.test_client().get('/api/ping').status_code == 200
+    assert second.extensions['ratelimiter'].in_flight == 0
+
+
+def test_login_is_limited_per_client(client, app):
+    app.config['RATELIMIT_ENABLED'] = True
+    codes = [client.post('/api/auth/login', json={}).status_code for _ in range(11)]
+    assert codes == [400] * 10 + [429]
+
+
+def test_token_does_not_reset_ip_budget(client, app):
+    app.config['RATELIMIT_ENABLED'] = True
+    with app.app_context():
+        users = [User(username=n, email=f'{n}@example.com', password_hash='x') for n in 'ab']
+        db.session.add_all(users)
+        db.session.commit()
+        tokens = [create_access_token(identity=str(u.id)) for u in users]
+
+    codes = [client.post('/api/auth/login', json={}).status_code for _ in range(10)]
+    assert codes == [400] * 10
+    for token in tokens:
+        resp = client.post('/api/auth/login', json={}, headers={'Authorization': f'Bearer {token}'})
+        assert resp.status_code == 429
+
+
+def test_trusted_proxy_sets_client_ip():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'MAX_IN_FLIGHT': 0,
+                      'RATELIMIT_TRUSTED_PROXIES': 1})
+    client = app.test_client()
+
+    def login(ip):
+        return client.post('/api/auth/login', json={}, headers={'X-Forwarded-For': ip},
+                           environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code
+
+    assert [login('203.0.113.5') for _ in range(11)] == [400] * 10 + [429]
+    assert login('203.0.113.6') == 400